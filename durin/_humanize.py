@@ -0,0 +1,43 @@
+"""
+Tiny replacement for ``humanize.naturaldelta``
+covering the durations durin deals with (token TTLs and expiries).
+"""
+
+from datetime import timedelta
+from functools import lru_cache
+
+_UNITS = (
+    ("year", 365 * 86400),
+    ("month", 30 * 86400),
+    ("day", 86400),
+    ("hour", 3600),
+    ("minute", 60),
+    ("second", 1),
+)
+
+
+def naturaldelta(td: timedelta) -> str:
+    """
+    Returns the given ``timedelta`` in the largest whole unit followed
+    by the remainder in the next smaller unit (if any),
+    e.g. ``"3 days"``, ``"1 day, 12 hours"`` or ``"1 month, 15 days"``.
+    """
+    return _naturaldelta_seconds(abs(int(td.total_seconds())))
+
+
+def _plural(num: int, name: str) -> str:
+    return "{0} {1}{2}".format(num, name, "" if num == 1 else "s")
+
+
+@lru_cache(maxsize=128)
+def _naturaldelta_seconds(seconds: int) -> str:
+    for idx, (name, size) in enumerate(_UNITS):
+        if seconds >= size:
+            text = _plural(seconds // size, name)
+            if idx + 1 < len(_UNITS):
+                next_name, next_size = _UNITS[idx + 1]
+                rest = (seconds % size) // next_size
+                if rest:
+                    text += ", " + _plural(rest, next_name)
+            return text
+    return "0 seconds"
@@ -59,12 +59,10 @@ class TokenAuthentication(BaseAuthentication):
             to_select = durin_settings.AUTHTOKEN_SELECT_RELATED_LIST
 
             # get AuthToken object
-            if isinstance(to_select, list):
-                auth_token = AuthToken.objects.select_related(*to_select).get(
-                    token=token_str
-                )
-            else:
-                auth_token = AuthToken.objects.get(token=token_str)
+            auth_token = AuthToken.objects.for_auth(
+                token_str,
+                select_related=to_select if isinstance(to_select, list) else None,
+            )
 
             # validate token
             if cls._cleanup_token(auth_token):
@@ -0,0 +1,136 @@
+"""
+Durin can cache the state of an :class:`durin.models.AuthToken` as a plain
+``dict`` (called the token *context*) in Django's cache.
+Similarly, the :class:`durin.models.Client` attributes needed on every request
+are cached as the client *context*.
+
+This is useful for code that only needs to know who a token belongs to and
+when it expires (for example, a middleware) and wants to avoid
+querying the database on every request.
+
+Cache keys are derived from a SHA-256 digest of the token string so that
+raw tokens are never stored in (or logged by) the cache backend.
+
+The cached token context is invalidated whenever the token is saved, renewed or
+deleted (either as an instance, ``token.delete()``, or by
+:class:`durin.views.LogoutAllView`). Its timeout is the lesser of
+``REST_DURIN["TOKEN_CACHE_TIMEOUT"]`` and the token's remaining lifetime.
+
+.. warning:: Tokens deleted through a queryset
+    (e.g. ``AuthToken.objects.filter(...).delete()``, the admin's bulk delete action)
+    or by a cascade (deleting the ``User`` or ``Client``) are **not** invalidated,
+    since no per-token hook runs for those deletes.
+    Their cached contexts live on until they time out, unless you call
+    :func:`invalidate_token_ctx` with the deleted token strings yourself.
+
+The cached client context is invalidated whenever the client is saved or deleted.
+Its timeout is ``REST_DURIN["CLIENT_CACHE_TIMEOUT"]``.
+"""
+
+import hashlib
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+
+from durin.settings import durin_settings
+
+
+def token_digest(token_str: str) -> str:
+    """
+    Returns a digest of the given token string
+    suitable for use in cache keys.
+    """
+    return hashlib.sha256(token_str.encode()).hexdigest()[:32]
+
+
+def _token_ctx_cache_key(token_str: str) -> str:
+    return "durin:tok:" + token_digest(token_str)
+
+
+def _load_token_ctx(token_str: str):
+    AuthToken = apps.get_model("durin", "AuthToken")
+    row = (
+        AuthToken.objects.filter(token=token_str)
+        .values("pk", "user_id", "client_id", "expiry")
+        .first()
+    )
+    if row is None:
+        return None
+    return {
+        "pk": row["pk"],
+        "user_id": row["user_id"],
+        "client_id": row["client_id"],
+        "expiry_ts": row["expiry"].timestamp(),
+    }
+
+
+def get_token_ctx(token_str: str):
+    """
+    Returns the context of the token with the given token string
+    or ``None`` if no such token exists.
+
+    The context is a ``dict`` with the keys
+    ``pk``, ``user_id``, ``client_id`` and ``expiry_ts`` (expiry as UNIX timestamp).
+    It is served from Django's cache when possible,
+    otherwise fetched from the database and then cached.
+
+    .. note:: The returned context may belong to an expired token.
+    """
+    key = _token_ctx_cache_key(token_str)
+    ctx = cache.get(key)
+    if ctx is None:
+        ctx = _load_token_ctx(token_str)
+        if ctx is None:
+            return None
+        timeout = int(
+            min(ctx["expiry_ts"] - time.time(), durin_settings.TOKEN_CACHE_TIMEOUT)
+        )
+        if timeout > 0:
+            cache.set(key, ctx, timeout=timeout)
+    return ctx
+
+
+def invalidate_token_ctx(*token_strs: str) -> None:
+    """
+    Removes the cached contexts of the tokens with the given token strings.
+
+    Call this after deleting tokens through a queryset,
+    since no per-token signals are sent in that case.
+    """
+    cache.delete_many([_token_ctx_cache_key(token_str) for token_str in token_strs])
+
+
+def _client_ctx_cache_key(client_pk) -> str:
+    return "durin:client:{0}".format(client_pk)
+
+
+def _load_client_ctx(client_pk) -> dict:
+    Client = apps.get_model("durin", "Client")
+    return (
+        Client.objects.filter(pk=client_pk)
+        .values("token_ttl", "throttle_rate")
+        .get()
+    )
+
+
+def get_client_ctx(client_pk) -> dict:
+    """
+    Returns the context of the client with the given ``pk``.
+
+    The context is a ``dict`` with the keys ``token_ttl`` and ``throttle_rate``.
+    It is served from Django's cache when possible,
+    otherwise fetched from the database and then cached.
+    """
+    return cache.get_or_set(
+        _client_ctx_cache_key(client_pk),
+        lambda: _load_client_ctx(client_pk),
+        timeout=durin_settings.CLIENT_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_client_ctx(client_pk) -> None:
+    """
+    Removes the cached context of the client with the given ``pk``.
+    """
+    cache.delete(_client_ctx_cache_key(client_pk))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from durin.models import AuthToken
+
+
+class Command(BaseCommand):
+    """
+    Deletes all expired :class:`durin.models.AuthToken` instances.
+
+    Tokens are deleted in batches so that no single ``DELETE`` statement
+    holds locks on a large number of rows.
+    Meant to be run periodically (e.g. via cron) during off-peak hours::
+
+        python manage.py purge_expired_tokens --batch-size 1000
+    """
+
+    help = "Deletes expired auth tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tokens to delete per query (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        expired_qs = AuthToken.objects.filter(expiry__lt=timezone.now())
+
+        total = 0
+        while True:
+            pks = list(expired_qs.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            deleted, _ = AuthToken.objects.filter(pk__in=pks).delete()
+            total += deleted
+
+        self.stdout.write("Deleted {0} expired token(s).".format(total))
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-15 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("durin", "0002_client_throttlerate"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="authtoken",
+            name="expiry",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-15 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("durin", "0003_authtoken_expiry_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="authtoken",
+            index=models.Index(
+                fields=["token", "id", "expiry", "user", "client"],
+                name="durin_authtoken_cover",
+            ),
+        ),
+    ]
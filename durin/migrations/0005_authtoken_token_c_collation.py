@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def _set_token_collation(collation):
+    def _run(apps, schema_editor):
+        # only PostgreSQL defaults to locale-aware collations for varchar columns
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        AuthToken = apps.get_model("durin", "AuthToken")
+        field = AuthToken._meta.get_field("token")
+        # indexes on the column are rebuilt by PostgreSQL as part of this ALTER
+        schema_editor.execute(
+            "ALTER TABLE {table} ALTER COLUMN {column} "
+            "TYPE varchar({max_length}) COLLATE {collation}".format(
+                table=schema_editor.quote_name(AuthToken._meta.db_table),
+                column=schema_editor.quote_name(field.column),
+                max_length=field.max_length,
+                collation=schema_editor.quote_name(collation),
+            )
+        )
+
+    return _run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("durin", "0004_authtoken_cover_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _set_token_collation("C"),
+            _set_token_collation("default"),
+        ),
+    ]
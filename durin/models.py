@@ -1,23 +1,27 @@
-import binascii
+import time
 from os import urandom
 
-import humanize
 from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from durin._humanize import naturaldelta
+from durin.cache import get_client_ctx, invalidate_client_ctx, invalidate_token_ctx
 from durin.settings import durin_settings
 from durin.signals import token_renewed
 from durin.throttling import UserClientRateThrottle
 
 User = settings.AUTH_USER_MODEL
 
+#: Number of random bytes needed for a hex token of ``TOKEN_CHARACTER_LENGTH``.
+_TOKEN_BYTES_LENGTH = durin_settings.TOKEN_CHARACTER_LENGTH // 2
+
 
 def _create_token_string() -> str:
-    return binascii.hexlify(
-        urandom(int(durin_settings.TOKEN_CHARACTER_LENGTH / 2))
-    ).decode()
+    return urandom(_TOKEN_BYTES_LENGTH).hex()
 
 
 class Client(models.Model):
@@ -75,25 +79,52 @@ class Client(models.Model):
     )
 
     def __str__(self):
-        td = humanize.naturaldelta(self.token_ttl)
+        td = naturaldelta(self.token_ttl)
         rate = self.throttle_rate or "null"
         return "({0}: {1}, {2})".format(self.name, td, rate)
 
 
 class AuthTokenManager(models.Manager):
     def create(self, user, client, delta_ttl=None):
+        """
+        Creates a new token for the given ``user`` and ``client``.
+
+        The token expires after ``delta_ttl`` if given, otherwise after
+        ``client.token_ttl``. If ``token_ttl`` was deferred on ``client``
+        (e.g. fetched with ``only()``), it is read from the cached client context
+        (see :doc:`cache`) instead of refreshing it from the database.
+        When creating tokens in a loop, pass ``delta_ttl`` to skip the lookup.
+        """
         token = _create_token_string()
 
-        if delta_ttl is not None:
-            expiry = timezone.now() + delta_ttl
-        else:
-            expiry = timezone.now() + client.token_ttl
+        if delta_ttl is None:
+            if "token_ttl" in client.get_deferred_fields():
+                delta_ttl = get_client_ctx(client.pk)["token_ttl"]
+            else:
+                delta_ttl = client.token_ttl
+        expiry = timezone.now() + delta_ttl
 
         instance = super(AuthTokenManager, self).create(
             token=token, user=user, client=client, expiry=expiry
         )
         return instance
 
+    def for_auth(self, token, select_related=None) -> "AuthToken":
+        """
+        Fetches the token with the given token string,
+        loading only the fields needed for authentication
+        (``token``, ``expiry``, ``user`` and ``client``).
+
+        ``select_related``, if given, is a list of relations
+        to pass to ``select_related``.
+
+        :raises AuthToken.DoesNotExist
+        """
+        qs = self.only("token", "expiry", "user", "client")
+        if select_related:
+            qs = qs.select_related(*select_related)
+        return qs.get(token=token)
+
 
 class AuthToken(models.Model):
     """
@@ -106,10 +137,22 @@ class AuthToken(models.Model):
                 fields=["user", "client"], name="unique token for user per client"
             )
         ]
+        indexes = [
+            # covers the columns read when authenticating a request,
+            # including the pk which Django always selects
+            models.Index(
+                fields=["token", "id", "expiry", "user", "client"],
+                name="durin_authtoken_cover",
+            )
+        ]
 
     objects = AuthTokenManager()
 
     #: Token string
+    #:
+    #: On PostgreSQL the column uses the ``"C"`` collation (see migration ``0005``)
+    #: since tokens are ASCII hex strings and byte-wise comparison is cheaper
+    #: for index lookups.
     token = models.CharField(
         max_length=durin_settings.TOKEN_CHARACTER_LENGTH,
         null=False,
@@ -137,17 +180,29 @@ class AuthToken(models.Model):
     #: Created time
     created = models.DateTimeField(auto_now_add=True)
     #: Expiry time
-    expiry = models.DateTimeField(null=False)
+    expiry = models.DateTimeField(null=False, db_index=True)
 
     def renew_token(self, request=None) -> "timezone.datetime":
         """
         Utility function to renew the token.
 
         Updates the :py:attr:`~expiry` attribute by ``Client.token_ttl``.
+
+        ``Client.token_ttl`` is read from ``self.client`` if it is already loaded,
+        otherwise from the cached client context (see :doc:`cache`).
+
+        :raises AuthToken.DoesNotExist: if the token no longer exists
+            (e.g. deleted by a concurrent logout).
         """
-        new_expiry = timezone.now() + self.client.token_ttl
+        if AuthToken.client.is_cached(self):
+            token_ttl = self.client.token_ttl
+        else:
+            token_ttl = get_client_ctx(self.client_id)["token_ttl"]
+        new_expiry = timezone.now() + token_ttl
+        if not AuthToken.objects.filter(pk=self.pk).update(expiry=new_expiry):
+            raise AuthToken.DoesNotExist("Token to renew no longer exists.")
         self.expiry = new_expiry
-        self.save(update_fields=("expiry",))
+        invalidate_token_ctx(self.token)
         token_renewed.send(
             sender=self,
             request=request,
@@ -155,17 +210,29 @@ class AuthToken(models.Model):
         )
         return new_expiry
 
+    @classmethod
+    def bulk_renew(cls, queryset, token_ttl) -> "timezone.datetime":
+        """
+        Utility function to renew all tokens in the given ``queryset``
+        with a single ``UPDATE`` query.
+
+        Sets the :py:attr:`~expiry` attribute to now + ``token_ttl``.
+        Unlike :meth:`renew_token`, the ``token_renewed`` signal is not sent
+        and cached token contexts (see :doc:`cache`) are left to time out.
+        """
+        new_expiry = timezone.now() + token_ttl
+        queryset.update(expiry=new_expiry)
+        return new_expiry
+
     @property
     def expires_in(self) -> str:
         """
         Dynamic property that gives the :py:attr:`~expiry`
-        attribute in human readable string format.
-
-        Uses `humanize package <https://github.com/jmoiron/humanize>`__.
+        attribute in human readable string format (e.g. ``"1 day"``).
         """
         if self.expiry:
             td = self.expiry - self.created
-            return humanize.naturaldelta(td)
+            return naturaldelta(td)
         else:
             return "N/A"
 
@@ -175,7 +242,31 @@ class AuthToken(models.Model):
         Dynamic property that returns ``True`` if token has expired,
         otherwise ``False``.
         """
-        return timezone.now() > self.expiry
+        return self.has_expired_at(time.time())
+
+    def has_expired_at(self, now_ts: float) -> bool:
+        """
+        Returns ``True`` if token has expired at the given UNIX timestamp,
+        otherwise ``False``.
+
+        Useful when checking many tokens against the same point in time.
+        """
+        return now_ts > self._expiry_ts
+
+    @property
+    def _expiry_ts(self) -> float:
+        # cached against the current ``expiry`` object so that
+        # reassigning ``expiry`` (e.g. on renewal) is picked up
+        expiry, ts = self.__dict__.get("_expiry_ts_cache", (None, None))
+        if expiry is not self.expiry:
+            ts = self.expiry.timestamp()
+            self.__dict__["_expiry_ts_cache"] = (self.expiry, ts)
+        return ts
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_token_ctx(self.token)
+        return result
 
     def __repr__(self) -> str:
         return "({0}, {1}/{2})".format(
@@ -184,3 +275,16 @@ class AuthToken(models.Model):
 
     def __str__(self) -> str:
         return self.token
+
+
+# ``post_delete`` is deliberately not connected: it would disable Django's
+# fast delete for every token queryset delete (e.g. ``purge_expired_tokens``).
+# Instance deletes are handled in ``AuthToken.delete``.
+@receiver(post_save, sender=AuthToken)
+def _invalidate_cached_token_ctx(sender, instance, **kwargs):
+    invalidate_token_ctx(instance.token)
+
+
+@receiver((post_save, post_delete), sender=Client)
+def _invalidate_cached_client_ctx(sender, instance, **kwargs):
+    invalidate_client_ctx(instance.pk)
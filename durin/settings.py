@@ -14,7 +14,8 @@ DEFAULTS = {
     "EXPIRY_DATETIME_FORMAT": api_settings.DATETIME_FORMAT,
     "TOKEN_CACHE_TIMEOUT": 60,
     "REFRESH_TOKEN_ON_LOGIN": False,
-    "AUTHTOKEN_SELECT_RELATED_LIST": ["user"],
+    "AUTHTOKEN_SELECT_RELATED_LIST": ["user", "client"],
+    "CLIENT_CACHE_TIMEOUT": 300,
 }
 
 IMPORT_STRINGS = {
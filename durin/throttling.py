@@ -20,11 +20,100 @@ Example ``settings.py``::
 
     The rate defined here serves as the default rate incase the
     ``throttle_rate`` field on :class:`durin.models.Client` is ``null``.
+
+.. note:: If `django-redis <https://github.com/jazzband/django-redis>`__ is installed
+    and configured as the ``default`` cache backend,
+    :class:`UserClientRateThrottle` counts requests in a fixed window
+    with a Redis Lua script (one atomic round trip per request)
+    instead of storing the request history list in the cache.
+    The counters are kept under their own ``durin:cnt:`` keys and if Redis
+    raises an error, the request history in the cache is used as a fallback.
 """
 
+import math
+import re
+from functools import lru_cache
+
 from django.core.exceptions import ValidationError as DjValidationError
 from rest_framework.throttling import UserRateThrottle
 
+from durin.cache import get_client_ctx, token_digest
+
+# try to import django-redis
+get_redis_connection = None
+RedisError = ()
+
+try:
+    from django_redis import get_redis_connection
+    from redis.exceptions import RedisError
+except ImportError:
+    pass
+
+_TIME_PERIODS_MAP = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_CLIENT_RATE_RE = re.compile(r"(\d+)/([smhd])")
+
+
+@lru_cache(maxsize=256)
+def _parse_rate_cached(rate) -> tuple:
+    """
+    Memoized equivalent of DRF's ``SimpleRateThrottle.parse_rate``.
+    Since only a handful of distinct rate strings are ever in use,
+    this avoids re-parsing the same string on every request.
+    """
+    if rate is None:
+        return (None, None)
+    num, period = rate.split("/")
+    return int(num), _TIME_PERIODS_MAP[period[0]]
+
+
+#: Fixed window counter which also checks and sets the token blacklist
+#: (``KEYS[2]``, optional), all in a single atomic round trip.
+#: Returns ``{allowed, seconds_to_wait}``. ``TTL`` rounds down to whole seconds,
+#: so it is clamped to at least ``1`` (``SETEX`` rejects a ``0`` expiry).
+_THROTTLE_LUA = """
+if #KEYS > 1 and redis.call('EXISTS', KEYS[2]) == 1 then
+    local blocked = redis.call('TTL', KEYS[2])
+    if blocked < 1 then
+        blocked = 1
+    end
+    return {0, blocked}
+end
+local n = redis.call('INCR', KEYS[1])
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    ttl = tonumber(ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+if ttl < 1 then
+    ttl = 1
+end
+if n > tonumber(ARGV[1]) then
+    if #KEYS > 1 then
+        redis.call('SETEX', KEYS[2], ttl, '1')
+    end
+    return {0, ttl}
+end
+return {1, ttl}
+"""
+
+
+@lru_cache(maxsize=None)
+def _get_throttle_script(alias="default"):
+    """
+    Returns the throttle script registered on the raw Redis client behind
+    the given cache alias or ``None`` if it is not a ``django-redis`` backend.
+
+    The script is run with ``EVALSHA`` (and loaded on first use).
+    """
+    if get_redis_connection is None:
+        return None
+    try:
+        conn = get_redis_connection(alias)
+    except NotImplementedError:
+        return None
+    return conn.register_script(_THROTTLE_LUA)
+
 
 class UserClientRateThrottle(UserRateThrottle):  # lgtm [py/missing-call-to-init]
     """
@@ -36,9 +125,6 @@ class UserClientRateThrottle(UserRateThrottle):  # lgtm [py/missing-call-to-init
     .. versionadded:: 0.2
     """
 
-    #: Same as the default
-    cache_format = "throttle_%(scope)s_%(ident)s"
-
     #: Scope for this throttle
     scope = "user_per_client"
 
@@ -51,37 +137,116 @@ class UserClientRateThrottle(UserRateThrottle):  # lgtm [py/missing-call-to-init
         The ``rate`` is set here because we need access to
         ``request`` object which is not available inside :py:meth:`~get_rate`.
         """
-        if request.user.is_authenticated and hasattr(request, "_auth"):
-            rate = request._auth.client.throttle_rate
+        self._blacklist_key = None
+        self._blocked_until = None
+        self._window_ttl = None
+
+        if getattr(request, "_auth", None) is not None:
+            rate = self._get_client_rate(request._auth)
             self.rate = rate if rate else self.get_rate()
+            self._blacklist_key = self._get_blacklist_key(request)
         else:
             self.rate = self.get_rate()
 
-        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.num_requests, self.duration = _parse_rate_cached(self.rate)
+
+        script = _get_throttle_script()
+        if script is not None:
+            try:
+                # the script checks the blacklist itself
+                return self._allow_request_redis(request, view, script)
+            except RedisError:
+                # fall back to the cache, which honours
+                # django-redis's ``IGNORE_EXCEPTIONS`` option
+                self._window_ttl = None
+
+        if self.rate is not None and self._blacklist_key is not None:
+            blocked_until = self.cache.get(self._blacklist_key)
+            if blocked_until is not None:
+                # already throttled, skip the request history bookkeeping
+                self._blocked_until = blocked_until
+                return False
 
         return super().allow_request(request, view)
 
+    @staticmethod
+    def _get_client_rate(auth_token) -> str:
+        """
+        Reads ``throttle_rate`` from ``auth_token.client`` if it is already loaded
+        (see ``AUTHTOKEN_SELECT_RELATED_LIST``),
+        otherwise from the cached client context.
+        """
+        if auth_token._meta.get_field("client").is_cached(auth_token):
+            return auth_token.client.throttle_rate
+        return get_client_ctx(auth_token.client_id)["throttle_rate"]
+
+    def _allow_request_redis(self, request, view, script) -> bool:
+        """
+        Fixed window counter using a Redis Lua script, so the blacklist check,
+        counting, expiry and blacklisting happen atomically in a single round trip.
+        """
+        if self.rate is None:
+            return True
+
+        # not DRF's request history key, which holds a pickled list
+        counter_key = "durin:cnt:{0}:{1}".format(self.scope, self._get_ident(request))
+        keys = [self.cache.make_key(counter_key)]
+        if self._blacklist_key is not None:
+            keys.append(self.cache.make_key(self._blacklist_key))
+        allowed, self._window_ttl = script(
+            keys=keys, args=[self.num_requests, self.duration]
+        )
+        return bool(allowed)
+
+    def throttle_failure(self) -> bool:
+        """
+        Blacklists the token until the throttle window frees up
+        so that subsequent requests are rejected with a single cache lookup.
+        """
+        if self._blacklist_key is not None:
+            wait = self.wait()
+            if wait:
+                self.cache.set(
+                    self._blacklist_key,
+                    self.timer() + wait,
+                    timeout=math.ceil(wait),
+                )
+        return super().throttle_failure()
+
+    def wait(self):
+        if self._blocked_until is not None:
+            return max(self._blocked_until - self.timer(), 0)
+        if self._window_ttl is not None:
+            return max(self._window_ttl, 0)
+        return super().wait()
+
     def get_cache_key(self, request, view) -> str:
-        if request.user.is_authenticated:
+        return self._make_key(self._get_ident(request))
+
+    def _get_ident(self, request):
+        if getattr(request, "_auth", None) is not None:
             # overwrite
-            if hasattr(request, "_auth"):
-                ident = self._get_user_client_ident(request)
-            else:
-                ident = request.user.pk
-        else:
-            ident = self.get_ident(request)
+            return self._get_user_client_ident(request)
+        if request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
 
-        return self.cache_format % {"scope": self.scope, "ident": ident}
+    def _make_key(self, ident) -> str:
+        # same format as DRF's ``cache_format``, without the dict + %-formatting
+        return "throttle_" + self.scope + "_" + str(ident)
+
+    def _get_blacklist_key(self, request) -> str:
+        return "durin:blk:{0}:{1}".format(self.scope, token_digest(request._auth.token))
 
     def _get_user_client_ident(self, request) -> str:
         """
         Identify the user-client pair making the request.
         (assumes that ``request._auth`` is set, see :py:meth:`~get_cache_key`).
+
+        Reads the foreign key ids on the token directly, so neither
+        ``request.user`` nor ``request._auth.client`` need to be loaded.
         """
-        user_pk = request._auth.user_id
-        client_pk = request._auth.client_id
-        ident = "user-{0}.client-{1}".format(user_pk, client_pk)
-        return ident
+        return "u{0}.c{1}".format(request._auth.user_id, request._auth.client_id)
 
     @staticmethod
     def validate_client_throttle_rate(rate):
@@ -91,12 +256,11 @@ class UserClientRateThrottle(UserRateThrottle):  # lgtm [py/missing-call-to-init
 
         *For internal use only.*
         """
-        TIME_PERIODS_MAP = {"s": 1, "m": 60, "h": 3600, "d": 86400}
-
-        try:
-            num, period = rate.split("/")
-            return int(num), TIME_PERIODS_MAP[period]
-        except KeyError:
-            raise DjValidationError("invalid period '{0}'.".format(period))
-        except Exception as e:
-            raise DjValidationError(e)
+        match = _CLIENT_RATE_RE.fullmatch(rate)
+        if match is None:
+            raise DjValidationError(
+                "invalid rate '{0}', expected format: "
+                "'number_of_requests/period'.".format(rate)
+            )
+        num, period = match.groups()
+        return int(num), _TIME_PERIODS_MAP[period]
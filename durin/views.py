@@ -1,15 +1,17 @@
 from datetime import datetime
 
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.utils.translation import ugettext_lazy as _
 from rest_framework import status
 from rest_framework.authtoken.serializers import AuthTokenSerializer
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import DateTimeField
 from rest_framework.views import APIView
 
 from durin.auth import TokenAuthentication
+from durin.cache import invalidate_token_ctx
 from durin.models import AuthToken, Client
 from durin.settings import durin_settings
 
@@ -146,8 +148,13 @@ class RefreshView(APIView):
     def renew_token(self, request, token: "AuthToken") -> "datetime":
         """
         How to renew the token instance.
+
+        :raises rest_framework.exceptions.AuthenticationFailed
         """
-        new_expiry = token.renew_token(request=request)
+        try:
+            new_expiry = token.renew_token(request=request)
+        except AuthToken.DoesNotExist:
+            raise AuthenticationFailed(_("Invalid token."))
         return new_expiry
 
     def post(self, request, *args, **kwargs):
@@ -200,7 +207,10 @@ class LogoutAllView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, *args, **kwargs):
-        request.user.auth_token_set.all().delete()
+        tokens_qs = request.user.auth_token_set.all()
+        token_strs = list(tokens_qs.values_list("token", flat=True))
+        tokens_qs.delete()
+        invalidate_token_ctx(*token_strs)
         user_logged_out.send(
             sender=request.user.__class__, request=request, user=request.user
         )
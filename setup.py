@@ -50,7 +50,7 @@ setup(
     ],
     keywords="django rest authentication login token client auth",
     packages=find_packages(exclude=[".github", "docs", "tests", "example_project"]),
-    install_requires=["django>=2.2", "djangorestframework>=3.7.0", "humanize"],
+    install_requires=["django>=2.2", "djangorestframework>=3.7.0"],
     project_urls={
         "Documentation": "https://django-rest-durin.readthedocs.io/",
         "Funding": "https://www.paypal.me/eshaanbansal",
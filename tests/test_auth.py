@@ -47,6 +47,17 @@ class AuthTestCase(CustomTestCase):
             ):
                 resp = self.client.get(root_url)
                 self.assertEqual(resp.status_code, 200)
+        # restore module level settings for other tests
+        reload(auth)
+
+    def test_for_auth_defers_unneeded_fields(self):
+        auth_token = AuthToken.objects.for_auth(
+            self.token_instance.token, select_related=["user", "client"]
+        )
+        self.assertEqual(auth_token.get_deferred_fields(), {"created"})
+        with self.assertNumQueries(0, msg="related objects were selected"):
+            self.assertEqual(auth_token.user, self.user)
+            self.assertEqual(auth_token.client, self.authclient)
 
     def test_update_token_key(self):
         self.assertEqual(AuthToken.objects.count(), 1)
@@ -0,0 +1,85 @@
+from django.urls import reverse
+
+from durin.cache import get_client_ctx, get_token_ctx
+from durin.models import AuthToken, Client
+
+from . import CustomTestCase
+
+logout_url = reverse("durin_logout")
+logoutall_url = reverse("durin_logoutall")
+
+
+class TokenCtxCacheTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.token_instance = AuthToken.objects.create(self.user, self.authclient)
+
+    def test_get_token_ctx(self):
+        with self.assertNumQueries(1):
+            ctx = get_token_ctx(self.token_instance.token)
+        self.assertEqual(ctx["pk"], self.token_instance.pk)
+        self.assertEqual(ctx["user_id"], self.user.pk)
+        self.assertEqual(ctx["client_id"], self.authclient.pk)
+        self.assertEqual(ctx["expiry_ts"], self.token_instance.expiry.timestamp())
+
+        with self.assertNumQueries(0, msg="context should be served from cache"):
+            self.assertEqual(get_token_ctx(self.token_instance.token), ctx)
+
+    def test_get_token_ctx_invalid_token(self):
+        self.assertIsNone(get_token_ctx("invalid"))
+
+    def test_token_ctx_invalidated_on_renew(self):
+        ctx = get_token_ctx(self.token_instance.token)
+        new_expiry = self.token_instance.renew_token()
+        new_ctx = get_token_ctx(self.token_instance.token)
+        self.assertNotEqual(ctx["expiry_ts"], new_ctx["expiry_ts"])
+        self.assertEqual(new_ctx["expiry_ts"], new_expiry.timestamp())
+
+    def test_token_ctx_invalidated_on_logout(self):
+        get_token_ctx(self.token_instance.token)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=("Token %s" % self.token_instance.token)
+        )
+        self.client.post(logout_url, {}, format="json")
+        self.assertIsNone(get_token_ctx(self.token_instance.token))
+
+    def test_token_ctx_invalidated_on_delete(self):
+        get_token_ctx(self.token_instance.token)
+        self.token_instance.delete()
+        self.assertIsNone(get_token_ctx(self.token_instance.token))
+
+    def test_token_ctx_invalidated_on_logoutall(self):
+        token2 = AuthToken.objects.create(self.user, Client.objects.create(name="cli"))
+        get_token_ctx(self.token_instance.token)
+        get_token_ctx(token2.token)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=("Token %s" % self.token_instance.token)
+        )
+        self.client.post(logoutall_url, {}, format="json")
+        self.assertIsNone(get_token_ctx(self.token_instance.token))
+        self.assertIsNone(get_token_ctx(token2.token))
+
+
+class ClientCtxCacheTestCase(CustomTestCase):
+    def test_get_client_ctx(self):
+        with self.assertNumQueries(1):
+            ctx = get_client_ctx(self.authclient.pk)
+        self.assertEqual(ctx["token_ttl"], self.authclient.token_ttl)
+        self.assertEqual(ctx["throttle_rate"], self.authclient.throttle_rate)
+
+        with self.assertNumQueries(0, msg="context should be served from cache"):
+            self.assertEqual(get_client_ctx(self.authclient.pk), ctx)
+
+    def test_client_ctx_invalidated_on_save(self):
+        get_client_ctx(self.authclient.pk)
+        self.authclient.throttle_rate = "5/m"
+        self.authclient.save()
+        self.assertEqual(get_client_ctx(self.authclient.pk)["throttle_rate"], "5/m")
+
+    def test_renew_token_uses_client_ctx(self):
+        AuthToken.objects.create(self.user, self.authclient)
+        token = AuthToken.objects.get(user=self.user)
+        get_client_ctx(self.authclient.pk)
+        with self.assertNumQueries(1, msg="only the UPDATE query is made"):
+            new_expiry = token.renew_token()
+        self.assertEqual(AuthToken.objects.get(pk=token.pk).expiry, new_expiry)
@@ -1,7 +1,13 @@
+from datetime import timedelta
+from io import StringIO
+
 from django.core.exceptions import ValidationError as DjValidationError
+from django.core.management import call_command
 from django.test import TestCase
 
-from durin.models import Client
+from durin.models import AuthToken, Client
+
+from . import CustomTestCase
 
 
 class ClientTestCase(TestCase):
@@ -17,6 +23,18 @@ class ClientTestCase(TestCase):
             Client.objects.create(name=name)
         self.assertEqual(Client.objects.count(), len(self.client_names))
 
+    def test_client_str(self):
+        testclient = Client(
+            name="test_client_str", token_ttl=timedelta(days=2), throttle_rate="2/m"
+        )
+        self.assertEqual(str(testclient), "(test_client_str: 2 days, 2/m)")
+
+        testclient.token_ttl = timedelta(hours=1, minutes=30)
+        testclient.throttle_rate = ""
+        self.assertEqual(
+            str(testclient), "(test_client_str: 1 hour, 30 minutes, null)"
+        )
+
     def test_throttle_rate_validation_ok(self):
         testclient = Client.objects.create(
             name="test_throttle_rate_validation", throttle_rate="2/m"
@@ -43,3 +61,73 @@ class ClientTestCase(TestCase):
             )
             testclient2.full_clean()
             testclient2.delete()
+
+        with self.assertRaises(DjValidationError):
+            testclient3 = Client.objects.create(
+                name="testclient3",
+                throttle_rate="2/m\n",
+            )
+            testclient3.full_clean()
+            testclient3.delete()
+
+
+class AuthTokenTestCase(CustomTestCase):
+    def test_bulk_renew(self):
+        AuthToken.objects.create(self.user, self.authclient, delta_ttl=timedelta(0))
+        AuthToken.objects.create(self.user2, self.authclient, delta_ttl=timedelta(0))
+        qs = AuthToken.objects.filter(client=self.authclient)
+
+        with self.assertNumQueries(1):
+            new_expiry = AuthToken.bulk_renew(qs, timedelta(days=1))
+
+        for token in qs:
+            self.assertEqual(token.expiry, new_expiry)
+            self.assertFalse(token.has_expired)
+
+    def test_create_with_deferred_token_ttl(self):
+        client = Client.objects.only("name").get(pk=self.authclient.pk)
+        with self.assertNumQueries(2, msg="client context lookup and INSERT"):
+            token = AuthToken.objects.create(self.user, client)
+        with self.assertNumQueries(1, msg="client context is served from cache"):
+            AuthToken.objects.create(self.user2, client)
+        self.assertGreater(token.expiry, token.created)
+
+    def test_has_expired_at(self):
+        token = AuthToken.objects.create(self.user, self.authclient)
+        expiry_ts = token.expiry.timestamp()
+        self.assertFalse(token.has_expired)
+        self.assertFalse(token.has_expired_at(expiry_ts))
+        self.assertTrue(token.has_expired_at(expiry_ts + 1))
+
+        token.expiry = token.created
+        self.assertTrue(token.has_expired, "reassigned expiry is picked up")
+
+    def test_expires_in(self):
+        instance = AuthToken.objects.create(self.user, self.authclient)
+        durations = (
+            (timedelta(days=1), "1 day"),
+            (timedelta(hours=36), "1 day, 12 hours"),
+            (timedelta(seconds=90), "1 minute, 30 seconds"),
+            (timedelta(days=45), "1 month, 15 days"),
+        )
+        for td, expected in durations:
+            instance.expiry = instance.created + td
+            self.assertEqual(instance.expires_in, expected)
+
+    def test_renew_deleted_token_raises(self):
+        token = AuthToken.objects.create(self.user, self.authclient)
+        AuthToken.objects.filter(pk=token.pk).delete()
+        with self.assertRaises(AuthToken.DoesNotExist):
+            token.renew_token()
+
+    def test_purge_expired_tokens(self):
+        AuthToken.objects.create(self.user, self.authclient, delta_ttl=timedelta(0))
+        AuthToken.objects.create(self.user2, self.authclient)
+
+        out = StringIO()
+        with self.assertNumQueries(3, msg="SELECT pks, fast DELETE, empty SELECT"):
+            call_command("purge_expired_tokens", batch_size=1, stdout=out)
+
+        self.assertIn("Deleted 1 expired token(s).", out.getvalue())
+        self.assertEqual(AuthToken.objects.count(), 1)
+        self.assertEqual(AuthToken.objects.get().user, self.user2)
@@ -1,17 +1,22 @@
 import time
 from datetime import timedelta
 from importlib import reload
+from unittest import mock
 
+from django.core.cache import cache as default_cache
 from django.test import override_settings
-from django.urls import reverse
+from django.urls import resolve, reverse
 from rest_framework import status
 from rest_framework.serializers import DateTimeField
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-from durin import views
+from durin import throttling, views
+from durin.cache import token_digest
 from durin.models import AuthToken, Client
 from durin.serializers import UserSerializer
 from durin.settings import durin_settings
 from durin.signals import token_expired, token_renewed
+from example_project.views import ThrottledView
 
 from . import CustomTestCase
 
@@ -306,6 +311,23 @@ class AuthViewsTestCase(CustomTestCase):
         self.assertNotEqual(resp.data["expiry"], instance.expiry)
         self.assertTrue(self.signal_was_called, "token_renewed signal was called.")
 
+    def test_refresh_view_deleted_token_401(self):
+        instance = AuthToken.objects.create(user=self.user, client=self.authclient)
+        self.client.credentials(HTTP_AUTHORIZATION=("Token %s" % instance.token))
+
+        # ``views`` may have been reloaded, patch the class the URL resolves to
+        view_class = resolve(refresh_url).func.view_class
+        renew_token = view_class.renew_token
+
+        def renew_after_logout(self, request, token):
+            # simulate a concurrent logout after authentication
+            AuthToken.objects.filter(pk=token.pk).delete()
+            return renew_token(self, request, token)
+
+        with mock.patch.object(view_class, "renew_token", renew_after_logout):
+            resp = self.client.post(refresh_url, {}, format="json")
+        self.assertEqual(resp.status_code, 401)
+
     def __create_clients(self):
         Client.objects.all().delete()
         self.assertEqual(Client.objects.count(), 0)
@@ -353,6 +375,19 @@ class ExampleProjectViewsTestCase(CustomTestCase):
             msg="Third request within the minute gets throttled",
         )
 
+        resp4 = self.client.get(throttled_view_url)
+        self.assertEqual(
+            resp4.status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            msg="blacklisted token stays throttled",
+        )
+        self.assertIn("Retry-After", resp4)
+        self.assertIsNotNone(
+            default_cache.get(
+                "durin:blk:user_per_client:{0}".format(token_digest(instance.token))
+            )
+        )
+
     def test_throttled_api_custom_rate_429(self):
         THROTTLE_NUM_REQUESTS = 5
 
@@ -376,6 +411,52 @@ class ExampleProjectViewsTestCase(CustomTestCase):
             msg="6th request within the minute gets throttled",
         )
 
+    def test_throttled_api_client_rate_change_429(self):
+        testauthclient = Client.objects.create(
+            name="test_throttled_api_client_rate_change_429",
+            throttle_rate="5/m",
+        )
+        instance = AuthToken.objects.create(self.user, testauthclient)
+        self.client.credentials(HTTP_AUTHORIZATION=("Token %s" % instance.token))
+
+        resp1 = self.client.get(throttled_view_url)
+        self.assertEqual(resp1.status_code, 200)
+
+        testauthclient.throttle_rate = "1/m"
+        testauthclient.save()
+
+        resp2 = self.client.get(throttled_view_url)
+        self.assertEqual(
+            resp2.status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            msg="cached throttle rate is invalidated when client is saved",
+        )
+
+    def test_throttled_api_uses_selected_client(self):
+        instance = AuthToken.objects.create(self.user, self.authclient)
+        self.client.credentials(HTTP_AUTHORIZATION=("Token %s" % instance.token))
+
+        with self.assertNumQueries(1, msg="only the auth query"):
+            resp = self.client.get(throttled_view_url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsNone(
+            default_cache.get("durin:client:{0}".format(self.authclient.pk)),
+            msg="client was selected by the auth query, no cached context needed",
+        )
+
+    def test_throttled_api_session_auth(self):
+        view = ThrottledView.as_view(authentication_classes=())
+        request = APIRequestFactory().get(throttled_view_url)
+        force_authenticate(request, user=self.user)
+
+        for _ in range(2):
+            self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(
+            view(request).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            msg="users authed without a durin token are throttled by user",
+        )
+
     def test_throttled_api_no_token_401(self):
         resp = self.client.get(throttled_view_url)
         self.assertEqual(
@@ -383,3 +464,163 @@ class ExampleProjectViewsTestCase(CustomTestCase):
             status.HTTP_401_UNAUTHORIZED,
             msg="No token was set",
         )
+
+
+class FakeThrottleScript:
+    """
+    Stands in for the registered Redis throttle script,
+    returning the given ``{allowed, seconds_to_wait}`` results in order.
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        return self.results.pop(0)
+
+
+class FakeRedisError(Exception):
+    pass
+
+
+class FakeIncrThrottleScript:
+    """
+    Counts with ``INCR`` semantics on the given store,
+    raising like Redis does when the key holds a non-integer value.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __call__(self, keys, args):
+        value = self.store.get(keys[0], 0)
+        if not isinstance(value, int):
+            raise FakeRedisError("value is not an integer or out of range")
+        self.store[keys[0]] = value + 1
+        return [int(value + 1 <= args[0]), args[1]]
+
+
+class RedisThrottleTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.token_instance = AuthToken.objects.create(self.user, self.authclient)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=("Token %s" % self.token_instance.token)
+        )
+
+    def test_throttled_api_allowed_then_denied(self):
+        script = FakeThrottleScript([1, 60], [0, 42])
+        with mock.patch(
+            "durin.throttling._get_throttle_script", return_value=script
+        ):
+            resp1 = self.client.get(throttled_view_url)
+            resp2 = self.client.get(throttled_view_url)
+
+        self.assertEqual(resp1.status_code, 200)
+        self.assertEqual(resp2.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(resp2["Retry-After"], "42", msg="taken from the script")
+
+        keys, args = script.calls[0]
+        self.assertEqual(
+            keys,
+            [
+                default_cache.make_key(
+                    "durin:cnt:user_per_client:u{0}.c{1}".format(
+                        self.user.pk, self.authclient.pk
+                    )
+                ),
+                default_cache.make_key(
+                    "durin:blk:user_per_client:{0}".format(
+                        token_digest(self.token_instance.token)
+                    )
+                ),
+            ],
+        )
+        self.assertEqual(args, [2, 60], msg="default rate in example_project")
+
+    def test_throttled_api_client_rate(self):
+        self.authclient.throttle_rate = "5/h"
+        self.authclient.save()
+        script = FakeThrottleScript([1, 3600])
+        with mock.patch(
+            "durin.throttling._get_throttle_script", return_value=script
+        ):
+            resp = self.client.get(throttled_view_url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(script.calls[0][1], [5, 3600])
+
+    def test_throttled_api_session_auth_no_blacklist_key(self):
+        view = ThrottledView.as_view(authentication_classes=())
+        request = APIRequestFactory().get(throttled_view_url)
+        force_authenticate(request, user=self.user)
+        script = FakeThrottleScript([0, 7])
+        with mock.patch(
+            "durin.throttling._get_throttle_script", return_value=script
+        ):
+            resp = view(request)
+
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(resp["Retry-After"], "7")
+        keys, _ = script.calls[0]
+        bucket_key = "durin:cnt:user_per_client:{0}".format(self.user.pk)
+        self.assertEqual(
+            keys,
+            [default_cache.make_key(bucket_key)],
+            msg="no blacklist key without a durin token",
+        )
+
+    def test_throttled_api_existing_history_list(self):
+        # e.g. left behind by the cache based throttle before a deploy
+        history_key = default_cache.make_key(
+            "throttle_user_per_client_u{0}.c{1}".format(
+                self.user.pk, self.authclient.pk
+            )
+        )
+        store = {history_key: [1600000000.0]}
+        script = FakeIncrThrottleScript(store)
+        with mock.patch(
+            "durin.throttling._get_throttle_script", return_value=script
+        ), mock.patch("durin.throttling.RedisError", FakeRedisError):
+            resp = self.client.get(throttled_view_url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(store[history_key], [1600000000.0], msg="left untouched")
+        self.assertEqual(len(store), 2, msg="counted under its own key")
+
+    def test_throttled_api_redis_error_falls_back_to_cache(self):
+        script = mock.Mock(side_effect=FakeRedisError("connection refused"))
+        with mock.patch(
+            "durin.throttling._get_throttle_script", return_value=script
+        ), mock.patch("durin.throttling.RedisError", FakeRedisError):
+            resp1 = self.client.get(throttled_view_url)
+            resp2 = self.client.get(throttled_view_url)
+            resp3 = self.client.get(throttled_view_url)
+
+        self.assertEqual(resp1.status_code, 200)
+        self.assertEqual(resp2.status_code, 200)
+        self.assertEqual(resp3.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        history = default_cache.get(
+            "throttle_user_per_client_u{0}.c{1}".format(
+                self.user.pk, self.authclient.pk
+            )
+        )
+        self.assertEqual(len(history), 2, msg="request history in the cache")
+
+    def test_get_throttle_script(self):
+        conn = mock.Mock()
+        backends = (
+            (None, None),
+            (mock.Mock(side_effect=NotImplementedError), None),
+            (mock.Mock(return_value=conn), conn.register_script.return_value),
+        )
+        for get_redis_connection, expected in backends:
+            throttling._get_throttle_script.cache_clear()
+            with mock.patch(
+                "durin.throttling.get_redis_connection", get_redis_connection
+            ):
+                self.assertIs(throttling._get_throttle_script(), expected)
+        throttling._get_throttle_script.cache_clear()
+        conn.register_script.assert_called_once_with(throttling._THROTTLE_LUA)